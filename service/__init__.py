@@ -23,8 +23,10 @@ and SQL database
 """
 import sys
 from flask import Flask
+from flask_caching import Cache
 from service import config
 from service.common import log_handlers
+from service.common.json_provider import OrjsonProvider
 
 # NOTE: Do not change the order of this code
 # The Flask app must be created
@@ -36,6 +38,12 @@ app = Flask(__name__)  # pylint: disable=invalid-name
 # Load Configurations
 app.config.from_object(config)
 
+# Use orjson for JSON encoding and decoding
+app.json = OrjsonProvider(app)
+
+# Set up the response cache
+cache = Cache(app)
+
 # Dependencies require we import the routes AFTER the Flask app is created
 # pylint: disable=wrong-import-position, wrong-import-order, cyclic-import
 from service import routes, models        # noqa: F401, E402
@@ -13,7 +13,20 @@ DATABASE_URI = os.getenv(
 # Configure SQLAlchemy
 SQLALCHEMY_DATABASE_URI = DATABASE_URI
 SQLALCHEMY_TRACK_MODIFICATIONS = False
-# SQLALCHEMY_POOL_SIZE = 2
+
+# Keep a pool of open connections so requests do not reconnect
+SQLALCHEMY_ENGINE_OPTIONS = {
+    "pool_pre_ping": True,
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+}
+# SQLite does not use a QueuePool, so it rejects the pool sizing options
+if not DATABASE_URI.startswith("sqlite"):
+    SQLALCHEMY_ENGINE_OPTIONS["pool_size"] = int(os.getenv("DB_POOL_SIZE", "5"))
+    SQLALCHEMY_ENGINE_OPTIONS["max_overflow"] = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+
+# Configure Flask-Caching
+CACHE_TYPE = os.getenv("CACHE_TYPE", "SimpleCache")
+CACHE_DEFAULT_TIMEOUT = int(os.getenv("CACHE_DEFAULT_TIMEOUT", "60"))
 
 # Secret for session management
 SECRET_KEY = os.getenv("SECRET_KEY", "sup3r-s3cr3t")
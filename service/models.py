@@ -26,13 +26,18 @@ Attributes:
 name (string) - the name of the product
 description (string) - the description the product belongs to (i.e., dog, cat)
 available (boolean) - True for products that are available for adoption
+updated_at (datetime) - when the product was last changed
 
 """
 import logging
+from datetime import datetime
 from enum import Enum
 from decimal import Decimal
+import msgspec
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import text, update
+from sqlalchemy.exc import DBAPIError
 
 logger = logging.getLogger("flask.app")
 
@@ -60,6 +65,16 @@ class Category(Enum):
     TOOLS = 5
 
 
+class ProductSchema(msgspec.Struct):  # pylint: disable=too-few-public-methods
+    """Schema used to validate incoming Product data"""
+
+    name: str
+    description: str
+    price: Decimal
+    available: bool
+    category: str
+
+
 class Product(db.Model):
     """
     Class that represents a Product
@@ -72,12 +87,15 @@ class Product(db.Model):
     # Table Schema
     ##################################################
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
+    name = db.Column(db.String(100), nullable=False, index=True)
     description = db.Column(db.String(250), nullable=False)
-    price = db.Column(db.Numeric, nullable=False)
-    available = db.Column(db.Boolean(), nullable=False, default=True)
+    price = db.Column(db.Numeric, nullable=False, index=True)
+    available = db.Column(db.Boolean(), nullable=False, default=True, index=True)
     category = db.Column(
-        db.Enum(Category), nullable=False, server_default=(Category.UNKNOWN.name)
+        db.Enum(Category), nullable=False, server_default=(Category.UNKNOWN.name), index=True
+    )
+    updated_at = db.Column(
+        db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow
     )
 
     ##################################################
@@ -130,25 +148,33 @@ class Product(db.Model):
             data (dict): A dictionary containing the Product data
         """
         try:
-            self.name = data["name"]
-            self.description = data["description"]
-            self.price = Decimal(data["price"])
-            if isinstance(data["available"], bool):
-                self.available = data["available"]
-            else:
-                raise DataValidationError(
-                    "Invalid type for boolean [available]: "
-                    + str(type(data["available"]))
-                )
-            self.category = getattr(Category, data["category"])  # create enum from string
-        except AttributeError as error:
-            raise DataValidationError("Invalid attribute: " + error.args[0]) from error
+            schema = msgspec.convert(data, type=ProductSchema)
+        except msgspec.ValidationError as error:
+            raise DataValidationError("Invalid product: " + str(error)) from error
+        return self._load(schema)
+
+    def deserialize_json(self, body: bytes):
+        """
+        Deserializes a Product from a JSON document, validating while decoding
+        Args:
+            body (bytes): A JSON document containing the Product data
+        """
+        try:
+            schema = msgspec.json.decode(body, type=ProductSchema)
+        except msgspec.DecodeError as error:
+            raise DataValidationError("Invalid product: " + str(error)) from error
+        return self._load(schema)
+
+    def _load(self, schema: ProductSchema):
+        """Copies validated Product data onto this Product"""
+        try:
+            self.category = Category[schema.category]  # create enum from string
         except KeyError as error:
-            raise DataValidationError("Invalid product: missing " + error.args[0]) from error
-        except TypeError as error:
-            raise DataValidationError(
-                "Invalid product: body of request contained bad or no data " + str(error)
-            ) from error
+            raise DataValidationError("Invalid attribute: " + error.args[0]) from error
+        self.name = schema.name
+        self.description = schema.description
+        self.price = schema.price
+        self.available = schema.available
         return self
 
     ##################################################
@@ -168,6 +194,67 @@ class Product(db.Model):
         db.init_app(app)
         app.app_context().push()
         db.create_all()  # make our sqlalchemy tables
+        cls.upgrade_db()
+
+    @classmethod
+    def upgrade_db(cls):
+        """Adds the columns and indexes missing from tables made by older releases
+
+        create_all() skips tables that already exist, so they are added here.
+        Workers starting together may race to make a change, so an error is
+        ignored when the change turns out to have been made by another worker.
+        """
+        if not cls._has_updated_at():
+            try:
+                cls._add_updated_at()
+            except DBAPIError:
+                if not cls._has_updated_at():
+                    raise
+                logger.info("Column updated_at was added by another worker")
+        for index in cls.__table__.indexes:
+            try:
+                index.create(db.engine, checkfirst=True)
+            except DBAPIError:
+                indexes = {ix["name"] for ix in db.inspect(db.engine).get_indexes(cls.__tablename__)}
+                if index.name not in indexes:
+                    raise
+
+    @classmethod
+    def _has_updated_at(cls) -> bool:
+        """Returns True if the product table has the updated_at column"""
+        columns = db.inspect(db.engine).get_columns(cls.__tablename__)
+        return any(column["name"] == "updated_at" for column in columns)
+
+    @classmethod
+    def _add_updated_at(cls):
+        """Adds the updated_at column, stamping existing rows with the current UTC time"""
+        table = cls.__tablename__
+        logger.info("Adding column updated_at to %s", table)
+        column_type = cls.updated_at.type.compile(dialect=db.engine.dialect)
+        # SQLite only accepts a constant default when adding a NOT NULL column
+        now = datetime.utcnow().isoformat(sep=" ", timespec="microseconds")
+        with db.engine.begin() as connection:
+            connection.execute(
+                text(f"ALTER TABLE {table} ADD COLUMN updated_at {column_type} NOT NULL DEFAULT '{now}'")
+            )
+            if db.engine.dialect.name != "sqlite":
+                # match the schema create_all() makes, which has no server default
+                connection.execute(text(f"ALTER TABLE {table} ALTER COLUMN updated_at DROP DEFAULT"))
+
+    @classmethod
+    def bulk_create(cls, products: list):
+        """Creates many Products in the database in a single commit
+
+        :param products: the Products to create
+        :type products: list
+
+        """
+        logger.info("Creating %d Products", len(products))
+        for product in products:
+            # id must be none to generate next primary key
+            product.id = None
+        db.session.add_all(products)
+        db.session.commit()
 
     @classmethod
     def all(cls) -> list:
@@ -175,6 +262,33 @@ class Product(db.Model):
         logger.info("Processing all Products")
         return cls.query.all()
 
+    @classmethod
+    def serialize_all(cls, query, batch_size: int = 500):
+        """Serializes the Products matched by a query without loading model instances
+
+        :param query: a query of Products, such as one returned by find_by_name()
+        :type query: Query
+        :param batch_size: the number of rows to fetch from the database at a time
+        :type batch_size: int
+
+        :return: a generator of Product dictionaries
+        :rtype: generator
+
+        """
+        logger.info("Serializing Products in batches of %d", batch_size)
+        rows = query.with_entities(
+            cls.id, cls.name, cls.description, cls.price, cls.available, cls.category
+        ).yield_per(batch_size)
+        for product_id, name, description, price, available, category in rows:
+            yield {
+                "id": product_id,
+                "name": name,
+                "description": description,
+                "price": str(price),
+                "available": available,
+                "category": category.name
+            }
+
     @classmethod
     def find(cls, product_id: int):
         """Finds a Product by it's ID
@@ -190,28 +304,77 @@ class Product(db.Model):
         return cls.query.get(product_id)
 
     @classmethod
-    def find_by_name(cls, name: str) -> list:
+    def update_by_id(cls, product_id: int, changes: "Product"):
+        """Updates a Product in a single UPDATE ... RETURNING statement
+
+        :param product_id: the id of the Product to update
+        :type product_id: int
+        :param changes: a deserialized Product holding the new data
+        :type changes: Product
+
+        :return: the updated Product, or None if not found
+        :rtype: Product
+
+        """
+        logger.info("Updating id %s ...", product_id)
+        statement = (
+            update(cls)
+            .where(cls.id == product_id)
+            .values(
+                name=changes.name,
+                description=changes.description,
+                price=changes.price,
+                available=changes.available,
+                category=changes.category,
+            )
+            .returning(cls)
+        )
+        product = db.session.execute(statement).scalar_one_or_none()
+        if product is not None:
+            # detach so the commit does not expire the RETURNING values
+            db.session.expunge(product)
+        db.session.commit()
+        return product
+
+    @classmethod
+    def delete_by_id(cls, product_id: int) -> bool:
+        """Removes a Product from the data store in a single DELETE statement
+
+        :param product_id: the id of the Product to delete
+        :type product_id: int
+
+        :return: True if a Product was deleted
+        :rtype: bool
+
+        """
+        logger.info("Deleting id %s ...", product_id)
+        deleted = db.session.query(cls).filter_by(id=product_id).delete()
+        db.session.commit()
+        return deleted > 0
+
+    @classmethod
+    def find_by_name(cls, name: str):
         """Returns all Products with the given name
 
         :param name: the name of the Products you want to match
         :type name: str
 
-        :return: a collection of Products with that name
-        :rtype: list
+        :return: a query of Products with that name
+        :rtype: Query
 
         """
         logger.info("Processing name query for %s ...", name)
         return cls.query.filter(cls.name == name)
 
     @classmethod
-    def find_by_price(cls, price: Decimal) -> list:
+    def find_by_price(cls, price: Decimal):
         """Returns all Products with the given price
 
         :param price: the price to search for
         :type name: float
 
-        :return: a collection of Products with that price
-        :rtype: list
+        :return: a query of Products with that price
+        :rtype: Query
 
         """
         logger.info("Processing price query for %s ...", price)
@@ -221,28 +384,28 @@ class Product(db.Model):
         return cls.query.filter(cls.price == price_value)
 
     @classmethod
-    def find_by_availability(cls, available: bool = True) -> list:
+    def find_by_availability(cls, available: bool = True):
         """Returns all Products by their availability
 
         :param available: True for products that are available
         :type available: str
 
-        :return: a collection of Products that are available
-        :rtype: list
+        :return: a query of Products that are available
+        :rtype: Query
 
         """
         logger.info("Processing available query for %s ...", available)
         return cls.query.filter(cls.available == available)
 
     @classmethod
-    def find_by_category(cls, category: Category = Category.UNKNOWN) -> list:
+    def find_by_category(cls, category: Category = Category.UNKNOWN):
         """Returns all Products by their Category
 
         :param category: values are ['MALE', 'FEMALE', 'UNKNOWN']
         :type available: enum
 
-        :return: a collection of Products that are available
-        :rtype: list
+        :return: a query of Products that are available
+        :rtype: Query
 
         """
         logger.info("Processing category query for %s ...", category.name)
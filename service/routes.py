@@ -18,12 +18,23 @@
 """
 Product Store Service with UI
 """
-from decimal import Decimal
-from flask import jsonify, request, abort
+from decimal import Decimal, InvalidOperation
+import orjson
+from flask import jsonify, request, abort, Response, stream_with_context
 from flask import url_for  # noqa: F401 pylint: disable=unused-import
 from service.models import Product, Category
 from service.common import status  # HTTP Status Codes
-from . import app
+from service.common.json_provider import default
+from . import app, cache
+
+# Lookup table of Category members by name
+CATEGORY_BY_NAME = {category.name: category for category in Category}
+
+# Query string values that mean True
+TRUE_VALUES = frozenset(("true", "yes", "1"))
+
+# The health check payload never changes so encode it once
+HEALTH_BODY = orjson.dumps({"status": status.HTTP_200_OK, "message": "OK"})
 
 
 ######################################################################
@@ -34,7 +45,7 @@ from . import app
 @app.route("/health")
 def healthcheck():
     """Let them know our heart is still beating"""
-    return jsonify(status=200, message="OK"), status.HTTP_200_OK
+    return Response(HEALTH_BODY, status=status.HTTP_200_OK, mimetype="application/json")
 
 
 ######################################################################
@@ -55,23 +66,30 @@ def index():
 
 def check_content_type(content_type):
     """Checks that the media type is correct"""
-    if "Content-Type" not in request.headers:
-        app.logger.error("No Content-Type specified.")
-        abort(
-            status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
-            f"Content-Type must be {content_type}",
-        )
-
-    if request.headers["Content-Type"] == content_type:
+    request_content_type = request.content_type
+    if request_content_type == content_type:
         return
 
-    app.logger.error("Invalid Content-Type: %s", request.headers["Content-Type"])
+    if request_content_type is None:
+        app.logger.error("No Content-Type specified.")
+    else:
+        app.logger.error("Invalid Content-Type: %s", request_content_type)
     abort(
         status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
         f"Content-Type must be {content_type}",
     )
 
 
+def stream_products(products):
+    """Yields serialized products as a JSON array one encoded item at a time"""
+    yield b"["
+    separator = b""
+    for product in products:
+        yield separator + orjson.dumps(product, default=default)
+        separator = b","
+    yield b"]"
+
+
 ######################################################################
 # C R E A T E   A   N E W   P R O D U C T
 ######################################################################
@@ -86,11 +104,12 @@ def create_products():
     app.logger.info("Request to Create a Product...")
     check_content_type("application/json")
 
-    data = request.get_json()
-    app.logger.info("Processing: %s", data)
+    data = request.get_data()
+    app.logger.info("Processing %d bytes", len(data))
     product = Product()
-    product.deserialize(data)
+    product.deserialize_json(data)
     product.create()
+    cache.clear()
     app.logger.info("Product with new id [%s] saved!", product.id)
 
     message = product.serialize()
@@ -104,45 +123,60 @@ def create_products():
 ######################################################################
 
 
-@app.route("/products", methods=["GET"])
-def list_products():
-    """ Returns a list of all products from the db or sorted by given attribute"""
+def find_by_category_name(category_name):
+    """Finds the Products in the named category, rejecting unknown names"""
+    category = CATEGORY_BY_NAME.get(category_name.upper())
+    if category is None:
+        abort(status.HTTP_400_BAD_REQUEST, f"Invalid category '{category_name}'.")
+    return Product.find_by_category(category)
 
-    app.logger.info("Getting all products...")
 
-    products = []
+def find_by_price_value(price_value):
+    """Finds the Products with the given price, rejecting values that are not numbers"""
+    try:
+        price = Decimal(price_value)
+    except InvalidOperation:
+        abort(status.HTTP_400_BAD_REQUEST, f"Invalid price '{price_value}'.")
+    return Product.find_by_price(price)
 
-    # Filtering names
-    product_name = request.args.get("name")
-    category_name = request.args.get("category")
-    product_available = request.args.get("available")
-    product_price = request.args.get("price")
 
-    if product_name:
-        app.logger.info("Filtering items by name: %s", product_name)
-        products = Product.find_by_name(product_name)
+# Query string filters, checked in order, and the queries they run
+PRODUCT_FILTERS = (
+    ("name", Product.find_by_name),
+    ("category", find_by_category_name),
+    ("available", lambda value: Product.find_by_availability(value.lower() in TRUE_VALUES)),
+    ("price", find_by_price_value),
+)
 
-    elif category_name:
-        app.logger.info("Filtering items by category: %s", category_name)
-        category = getattr(Category, category_name.upper())
-        products = Product.find_by_category(category)
 
-    elif product_available:
-        app.logger.info("Filtering items by status: %s", product_available)
-        available_value = product_available.lower() in ["true", "yes", "1"]
-        products = Product.find_by_availability(available_value)
+@app.route("/products", methods=["GET"])
+@cache.cached(query_string=True, response_filter=lambda response: not response.is_streamed)
+def list_products():
+    """ Returns a list of all products from the db or sorted by given attribute"""
 
-    elif product_price:
-        app.logger.info("Filtering items by price: %s", product_price)
-        products = Product.find_by_price(Decimal(product_price))
+    app.logger.info("Getting all products...")
 
+    # Apply the first filter given in the query string
+    for filter_name, find_products in PRODUCT_FILTERS:
+        filter_value = request.args.get(filter_name)
+        if filter_value:
+            app.logger.info("Filtering items by %s: %s", filter_name, filter_value)
+            products = find_products(filter_value)
+            break
     else:
+        # Stream the full catalog so it is never buffered in memory
         app.logger.info("Returning a list of all items.")
-        products = Product.all()
+        return Response(
+            stream_with_context(stream_products(Product.serialize_all(Product.query))),
+            status=status.HTTP_200_OK,
+            mimetype="application/json",
+        )
 
-    product_list = [p.serialize() for p in products]
+    product_list = list(Product.serialize_all(products))
 
-    return product_list, status.HTTP_200_OK
+    # Encode straight to bytes to bypass the JSON provider dispatch
+    body = orjson.dumps(product_list, default=default)
+    return Response(body, status=status.HTTP_200_OK, mimetype="application/json")
 
 ######################################################################
 # R E A D   A   P R O D U C T
@@ -158,9 +192,17 @@ def get_a_product(product_id):
     if not product:
         abort(status.HTTP_404_NOT_FOUND, f"Product with id '{product_id}' was not found.")
 
-    
+    # Skip serialization when the client already has this version
+    etag = f"{product.id}-{int(product.updated_at.timestamp() * 1000000)}"
+    if request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=status.HTTP_304_NOT_MODIFIED)
+        response.set_etag(etag, weak=True)
+        return response
+
     message = product.serialize()
-    return jsonify(message), status.HTTP_200_OK
+    response = jsonify(message)
+    response.set_etag(etag, weak=True)
+    return response, status.HTTP_200_OK
 
 
 ######################################################################
@@ -175,15 +217,13 @@ def update_a_product(product_id):
     app.logger.info("Request to Update a product with id [%s]", product_id)
     check_content_type("application/json")
 
-    product = Product.find(product_id)
+    changes = Product().deserialize_json(request.get_data())
+    product = Product.update_by_id(product_id, changes)
 
     if not product:
         abort(status.HTTP_404_NOT_FOUND, f"Product with id '{product_id}' was not found.")
 
-    data = request.get_json()   # Json update
-    product.deserialize(data)   # Updated dict
-    product.id = product_id
-    product.update()
+    cache.clear()
     return jsonify(product.serialize()), status.HTTP_200_OK
 
 ######################################################################
@@ -197,11 +237,9 @@ def delete_a_product(product_id):
 
     app.logger.info("Request to Delete a product with id [%s]", product_id)
 
-    product = Product.find(product_id)
-
-    if product:
-        product.delete()
-        app.logger.info("Deleted ", product.name)
+    if Product.delete_by_id(product_id):
+        cache.clear()
+        app.logger.info("Deleted product with id [%s]", product_id)
         return {"message": "Product deleted."}, status.HTTP_200_OK
 
     return {"message": "Product with given ID not found."}, status.HTTP_404_NOT_FOUND
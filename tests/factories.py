@@ -21,9 +21,10 @@ import factory
 from factory.fuzzy import FuzzyChoice, FuzzyDecimal
 from service.models import Product, Category
 
-CATEGORIES = list(Category)
-PRODUCTS = ["socks", "car", "headphones", "screwdriver", "headlight", "blender", "kettle", "blouse", "shirt",
-            "apple", "banana", "pear"]
+CATEGORIES = tuple(Category)
+PRODUCTS = ("socks", "car", "headphones", "screwdriver", "headlight", "blender", "kettle", "blouse", "shirt",
+            "apple", "banana", "pear")
+AVAILABILITY = (True, False)
 
 
 class ProductFactory(factory.Factory):
@@ -38,5 +39,5 @@ class ProductFactory(factory.Factory):
     name = FuzzyChoice(choices=PRODUCTS)
     description = factory.Faker("sentence", nb_words=5)
     price = FuzzyDecimal(5, 50, 0)
-    available = FuzzyChoice(choices=[True, False])
+    available = FuzzyChoice(choices=AVAILABILITY)
     category = FuzzyChoice(choices=CATEGORIES)
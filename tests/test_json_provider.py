@@ -0,0 +1,56 @@
+# Copyright 2016, 2023 John J. Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Test cases for the orjson JSON Provider
+
+Test cases can be run with:
+    nosetests
+    coverage report -m
+
+While debugging just these tests it's convenient to use this:
+    nosetests --stop tests/test_json_provider.py:TestOrjsonProvider
+
+"""
+from decimal import Decimal
+from unittest import TestCase
+from service import app
+from service.common.json_provider import OrjsonProvider, default
+
+
+class TestOrjsonProvider(TestCase):
+    """Test the orjson JSON Provider"""
+
+    def setUp(self):
+        self.provider = OrjsonProvider(app)
+
+    def test_app_uses_orjson(self):
+        """It should install the orjson provider on the app"""
+        self.assertIsInstance(app.json, OrjsonProvider)
+
+    def test_dumps_decimal(self):
+        """It should serialize Decimal values as strings"""
+        data = {"price": Decimal("12.50"), "category": "FOOD"}
+        self.assertEqual(
+            self.provider.dumps(data), '{"price":"12.50","category":"FOOD"}'
+        )
+
+    def test_loads(self):
+        """It should deserialize str and bytes"""
+        self.assertEqual(self.provider.loads('{"a":1}'), {"a": 1})
+        self.assertEqual(self.provider.loads(b"[true]"), [True])
+
+    def test_default_unsupported_type(self):
+        """It should raise TypeError for unsupported types"""
+        self.assertRaises(TypeError, default, object())
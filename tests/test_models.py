@@ -24,8 +24,10 @@ While debugging just these tests it's convenient to use this:
 
 """
 import os
+import json
 import logging
 import unittest
+from datetime import datetime
 from decimal import Decimal
 from service.models import Product, Category, db, DataValidationError
 from service import app
@@ -182,6 +184,41 @@ class TestProductModel(unittest.TestCase):
         products = Product.all()
         self.assertEqual(products, [])
 
+    def test_bulk_create_products(self):
+        """It should Create many products in a single commit"""
+        products = ProductFactory.build_batch(5)
+        Product.bulk_create(products)
+        for product in products:
+            self.assertIsNotNone(product.id)
+        self.assertEqual(len(Product.all()), 5)
+
+    def test_update_by_id(self):
+        """It should Update a product by id in a single statement"""
+        product = ProductFactory()
+        product.create()
+        data = product.serialize()
+        data["description"] = "This is an updated description."
+        changes = Product().deserialize(data)
+        updated = Product.update_by_id(product.id, changes)
+        self.assertEqual(updated.id, product.id)
+        self.assertEqual(updated.description, "This is an updated description.")
+        self.assertIsNone(Product.update_by_id(0, changes))
+
+    def test_delete_by_id(self):
+        """It should Delete a product by id in a single statement"""
+        product = ProductFactory()
+        product.create()
+        self.assertTrue(Product.delete_by_id(product.id))
+        self.assertEqual(Product.all(), [])
+        self.assertFalse(Product.delete_by_id(product.id))
+
+    def test_serialize_all(self):
+        """It should serialize a query of products the same as serialize()"""
+        Product.bulk_create(ProductFactory.build_batch(3))
+        expected = sorted((p.serialize() for p in Product.all()), key=lambda p: p["id"])
+        serialized = list(Product.serialize_all(Product.query.order_by(Product.id)))
+        self.assertEqual(serialized, expected)
+
     def test_list_all_products(self):
         """ It should return all existing products in the db """
         # Check db is empty
@@ -214,13 +251,7 @@ class TestProductModel(unittest.TestCase):
         self.assertEqual(products, [])
 
         # Create 15 new products
-        for _ in range(15):
-            product = ProductFactory()
-            logging.debug("Creating %s", product)
-            product.id = None
-            product.create()
-            self.assertNotEqual(product.id, None)
-            logging.info("Created %s", product)
+        Product.bulk_create(ProductFactory.build_batch(15))
 
         # Check db has 15 items
         products = Product.all()
@@ -231,7 +262,7 @@ class TestProductModel(unittest.TestCase):
         name = product_db.name
         found = Product.find_by_name(name)
         products_count = len([p for p in products if p.name == name])
-        found_count = len(list(found))
+        found_count = found.count()
 
         self.assertEqual(found_count, products_count)
         self.assertEqual(found[0].name, name)
@@ -243,10 +274,7 @@ class TestProductModel(unittest.TestCase):
         self.assertEqual(products, [])
 
         # Create 15 new products
-        for _ in range(15):
-            product = ProductFactory()
-            product.create()
-            logging.info("Created %s", product)
+        Product.bulk_create(ProductFactory.build_batch(15))
 
         # Check db has 15 items
         products = Product.all()
@@ -257,7 +285,7 @@ class TestProductModel(unittest.TestCase):
         available = product_db.available
         found = Product.find_by_availability(available)
         products_count = len([p for p in products if p.available == available])
-        found_count = len(list(found))
+        found_count = found.count()
 
         self.assertEqual(found_count, products_count)
         self.assertEqual(found[0].available, available)
@@ -269,10 +297,7 @@ class TestProductModel(unittest.TestCase):
         self.assertEqual(products, [])
 
         # Create 15 new products
-        for _ in range(15):
-            product = ProductFactory()
-            product.create()
-            logging.info("Created %s", product)
+        Product.bulk_create(ProductFactory.build_batch(15))
 
         # Check db has 15 items
         products = Product.all()
@@ -283,7 +308,7 @@ class TestProductModel(unittest.TestCase):
         cat = product_db.category
         found = Product.find_by_category(cat)
         products_count = len([p for p in products if p.category == cat])
-        found_count = len(list(found))
+        found_count = found.count()
 
         self.assertEqual(found_count, products_count)
         self.assertEqual(found[0].category, cat)
@@ -295,11 +320,7 @@ class TestProductModel(unittest.TestCase):
         self.assertEqual(products, [])
 
         # Create 15 new products
-        for _ in range(15):
-            product = ProductFactory()
-            product.create()
-            logging.info("Created %s", product)
-            logging.info("Price is %s", product.price)
+        Product.bulk_create(ProductFactory.build_batch(15))
 
         # Check db has 15 items
         products = Product.all()
@@ -310,12 +331,43 @@ class TestProductModel(unittest.TestCase):
         price = product_db.price
         found = Product.find_by_price(price)
         products_count = len([p for p in products if p.price == price])
-        found_count = len(list(found))
+        found_count = found.count()
         logging.info("Found %s", found)
 
         self.assertEqual(found_count, products_count)
         self.assertEqual(found[0].price, price)
 
+    def test_filter_columns_are_indexed(self):
+        """It should index the columns used by the find_by_* queries"""
+        indexes = {index["name"] for index in db.inspect(db.engine).get_indexes("product")}
+        for column in ("name", "category", "available", "price"):
+            self.assertIn(f"ix_product_{column}", indexes)
+
+    def test_upgrade_db_adds_updated_at(self):
+        """It should add updated_at to a product table made by an older release"""
+        product = ProductFactory()
+        product.create()
+        product_id = product.id
+        db.session.remove()
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(db.text("ALTER TABLE product DROP COLUMN updated_at"))
+            before = datetime.utcnow()
+
+            Product.upgrade_db()
+            columns = {column["name"]: column for column in db.inspect(db.engine).get_columns("product")}
+            self.assertIn("updated_at", columns)
+            self.assertFalse(columns["updated_at"]["nullable"])
+            self.assertGreaterEqual(Product.find(product_id).updated_at, before)
+
+            # Running it again leaves the table alone
+            Product.upgrade_db()
+        finally:
+            # put back the schema the model declares for the other tests
+            db.session.remove()
+            db.drop_all()
+            db.create_all()
+
     def test_convert_str_price_to_float(self):
         """ It should convert a price format from string to a float """
         # Check db is empty
@@ -371,6 +423,22 @@ class TestProductModel(unittest.TestCase):
         with self.assertRaises(DataValidationError):
             product.deserialize(product_dict)
 
+    def test_deserialize_json(self):
+        """ It should Deserialize a product from a JSON document """
+        product = ProductFactory()
+        body = json.dumps(product.serialize()).encode()
+        new_product = Product().deserialize_json(body)
+        self.assertEqual(new_product.name, product.name)
+        self.assertEqual(new_product.price, product.price)
+        self.assertEqual(new_product.category, product.category)
+
+    def test_deserialize_json_bad_data(self):
+        """ It should return DataValidationError for malformed JSON or an unknown category """
+        product = Product()
+        self.assertRaises(DataValidationError, product.deserialize_json, b"{not json")
+        body = b'{"name": "hat", "description": "A red hat", "price": "1", "available": true, "category": "HATS"}'
+        self.assertRaises(DataValidationError, product.deserialize_json, body)
+
     def test_update_with_wrong_id(self):
         """ It should return DataValidationError for updating a product with incorrect id """
         # Create a new product
@@ -29,7 +29,7 @@ import logging
 from decimal import Decimal
 from unittest import TestCase
 from urllib.parse import quote_plus
-from service import app
+from service import app, cache
 from service.common import status
 from service.models import db, init_db, Product
 from tests.factories import ProductFactory
@@ -72,6 +72,7 @@ class TestProductRoutes(TestCase):
         self.client = app.test_client()
         db.session.query(Product).delete()  # clean up the last tests
         db.session.commit()
+        cache.clear()
 
     def tearDown(self):
         db.session.remove()
@@ -110,6 +111,7 @@ class TestProductRoutes(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         data = response.get_json()
         self.assertEqual(data['message'], 'OK')
+        self.assertEqual(data['status'], status.HTTP_200_OK)
 
     ############################################################
     # TEST CREATE
@@ -181,6 +183,28 @@ class TestProductRoutes(TestCase):
         product_db = response.get_json()
         self.assertEqual(product_db["name"], product.name)
 
+    def test_get_a_product_not_modified(self):
+        """It should return 304 when the client has the current ETag"""
+        product = self._create_products(1)[0]
+        response = self.client.get(f"{BASE_URL}/{product.id}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response.headers.get("ETag")
+        self.assertIsNotNone(etag)
+
+        response = self.client.get(f"{BASE_URL}/{product.id}", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.data, b"")
+        self.assertEqual(response.headers.get("ETag"), etag)
+
+        # Updating the product changes its ETag
+        data = product.serialize()
+        data["name"] = "Ubot"
+        response = self.client.put(f"{BASE_URL}/{product.id}", json=data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(f"{BASE_URL}/{product.id}", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.headers.get("ETag"), etag)
+
     def test_get_product_with_wrong_id(self):
         """ It should return a 404 status code when trying to get a product with invalid id """
 
@@ -197,9 +221,41 @@ class TestProductRoutes(TestCase):
         self._create_products(5)
         resp = self.client.get(BASE_URL)
         self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.content_type, "application/json")
         data = resp.get_json()
         self.assertEqual(len(data), 5)
 
+    def test_list_products_is_cached(self):
+        """It should serve repeated filtered listings from the cache until a write"""
+        name = self._create_products(2)[0].name
+        resp = self.client.get(BASE_URL, query_string=f"name={name}")
+        count = len(resp.get_json())
+
+        # Add a product behind the API's back
+        product = ProductFactory(name=name)
+        product.create()
+        resp = self.client.get(BASE_URL, query_string=f"name={name}")
+        self.assertEqual(len(resp.get_json()), count)
+
+        # Writing through the API invalidates the cache
+        resp = self.client.post(BASE_URL, json=ProductFactory(name=name).serialize())
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        resp = self.client.get(BASE_URL, query_string=f"name={name}")
+        self.assertEqual(len(resp.get_json()), count + 2)
+
+    def test_list_all_products_is_streamed(self):
+        """It should stream the full listing instead of caching it"""
+        self._create_products(2)
+        resp = self.client.get(BASE_URL)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(resp.get_json()), 2)
+
+        # The full listing always reflects the database
+        product = ProductFactory()
+        product.create()
+        resp = self.client.get(BASE_URL)
+        self.assertEqual(len(resp.get_json()), 3)
+
     def test_list_by_name(self):
         """ It should return a list of all products with the given name """
         products = self._create_products(10)
@@ -228,6 +284,16 @@ class TestProductRoutes(TestCase):
         for i in data:
             self.assertEqual(i["category"], product_category)
 
+    def test_list_by_invalid_category(self):
+        """It should return 400 for an unknown category"""
+        response = self.client.get(BASE_URL, query_string="category=SPACESHIPS")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_by_invalid_price(self):
+        """It should return 400 for a price that is not a number"""
+        response = self.client.get(BASE_URL, query_string="price=abc")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_list_by_status(self):
         """ It should return a list of all available products """
         products = self._create_products(10)
@@ -312,6 +378,11 @@ class TestProductRoutes(TestCase):
         all_products = self.client.get(f"{BASE_URL}")
         self.assertEqual(len(all_products.get_json()), count - 1)
 
+    def test_delete_a_product_with_wrong_id(self):
+        """ It should return a 404 status code when deleting a missing product """
+        response = self.client.delete(f"{BASE_URL}/0")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
     ######################################################################
     # Utility functions
     ######################################################################